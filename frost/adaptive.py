@@ -0,0 +1,110 @@
+class AdaptiveChunkSize(object):
+
+    """Controller for the size of fan-out requests
+
+    Measures the latency and item count of each response and sizes the
+    next chunk so a request takes about `target_seconds`. The size is in
+    whatever unit the caller splits requests by, e.g. hours of a time range.
+
+    Rejected sizes are remembered, the size never grows back to one that
+    was rejected and sizes between the largest accepted and the smallest
+    rejected one are probed by halving the gap.
+
+    >>> chunks = AdaptiveChunkSize(initial=720, target_seconds=10)
+    >>> chunks.record(size=720, elapsed=2.5, items=720)
+    1440
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, target_seconds=10,
+                 max_items=100000, smoothing=0.5, max_growth=2):
+        """
+        :param int initial: The size of the first chunk
+        :param int minimum: The smallest chunk size
+        :param int maximum: The largest chunk size, no limit if None
+        :param float target_seconds: The response time to aim for
+        :param int max_items: The number of items a response should stay
+            below, the server rejects responses that are too large
+        :param float smoothing: Weight of the latest measurement, between
+            0 and 1
+        :param float max_growth: The most a chunk can grow from one request
+            to the next, as a factor
+
+        :raises ValueError: raises exception if minimum is less than 1
+        """
+        if minimum < 1:
+            raise ValueError('minimum must be at least 1, got %r' % minimum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_items = max_items
+        self.smoothing = smoothing
+        self.max_growth = max_growth
+        self.seconds_per_unit = None
+        self.items_per_unit = None
+        # largest size accepted and largest size not known to be rejected,
+        # set once a chunk is rejected
+        self.accepted = None
+        self.limit = None
+        self.size = self.clamp(initial)
+
+    def clamp(self, size):
+        """Returns size limited to the minimum and maximum chunk size"""
+        size = max(self.minimum, int(size))
+        if self.maximum is not None:
+            size = min(self.maximum, size)
+        if self.limit is not None:
+            size = min(self.limit, size)
+        return size
+
+    def smooth(self, previous, latest):
+        if previous is None:
+            return latest
+        return self.smoothing * latest + (1 - self.smoothing) * previous
+
+    def record(self, size, elapsed, items):
+        """Record a completed request and compute the next chunk size
+
+        :param int size: The size of the chunk that was requested
+        :param float elapsed: The response time in seconds
+        :param int items: The number of items in the response
+
+        :returns: The next chunk size
+        """
+        size = max(size, 1)
+        self.seconds_per_unit = self.smooth(self.seconds_per_unit,
+                                            elapsed / size)
+        self.items_per_unit = self.smooth(self.items_per_unit, items / size)
+
+        wanted = self.size * self.max_growth
+        if self.seconds_per_unit > 0:
+            wanted = min(wanted, self.target_seconds / self.seconds_per_unit)
+        if self.max_items and self.items_per_unit > 0:
+            wanted = min(wanted, self.max_items / self.items_per_unit)
+
+        if self.limit is not None:
+            self.accepted = max(self.accepted or 0, size)
+            if wanted > self.accepted:
+                # halfway between the largest accepted and rejected size
+                wanted = min(wanted, (self.accepted + self.limit + 1) // 2)
+
+        self.size = self.clamp(wanted)
+        return self.size
+
+    def shrink(self, size):
+        """Record that a chunk was rejected as too large or timed out
+
+        :param int size: The size of the rejected chunk
+
+        :returns: The next chunk size, the largest accepted size if it is
+            smaller than the rejected one, otherwise at most half of it
+        """
+        limit = max(self.minimum, size - 1)
+        self.limit = limit if self.limit is None else min(self.limit, limit)
+        if self.accepted is not None and self.accepted >= size:
+            # a size that was accepted before is rejected now
+            self.accepted = None
+        if self.accepted is None:
+            self.size = self.clamp(min(self.size, size // 2))
+        else:
+            self.size = self.clamp(min(self.size, self.accepted))
+        return self.size
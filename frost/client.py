@@ -1,19 +1,41 @@
 import os
+import re
+import time
+import warnings
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urljoin
 import requests
 from requests.auth import HTTPBasicAuth
+from .adaptive import AdaptiveChunkSize
 from .models import SourcesResponse
 from .models import AvailableTimeSeriesResponse
 from .models import ObservationsResponse
+from .models import ElementsResponse
+from .models import ObservationsCSVResponse
+from .models.observations_csv_response import CSV_FIELDS
+from .models.utils import _as_list, _to_utc, filter_observations_hook
 
 FROST_API_KEY = os.environ.get('FROST_API_KEY', None)
 
+# format of the reference times sent by get_observations_adaptive
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# get_observations options handled by the client, not API parameters
+CLIENT_OPTIONS = ('validate_elements', 'transport')
+
+# error codes where a batch of elements is split to find the bad ones,
+# if the error is about the elements
+SPLIT_ERROR_CODES = (400, 404, 412)
+
 
 class APIError(Exception):
     """ Raised when the API responds with a 400 og 404 """
 
     def __init__(self, e):
         self.code = e['code']
+        self.message = e.get('message', '')
+        self.reason = e.get('reason', '')
 
 
 class Frost(object):
@@ -29,12 +51,14 @@ class Frost(object):
     >>>  frost = Frost(username="myapikey")
     """
 
-    def __init__(self, username=None):
+    def __init__(self, username=None, timeout=60):
         """
         :param str username: your own frost.met.no username/key.
+        :param float timeout: seconds to wait for a response from the API.
         """
         self.base_url = 'https://frost.met.no/'
         self.api_version = 'v0'
+        self.timeout = timeout
         self.session = requests.Session()
         self.username = username or FROST_API_KEY
         if not self.username:
@@ -45,6 +69,10 @@ class Frost(object):
                 use the Frost class
                 """)
         self.session.auth = (self.username, '')
+        # source metadata keyed by station id, None for unknown ids
+        self.sources_index = {}
+        # normalized element id to element id, loaded on first use
+        self.elements_index = None
 
     def let_it_go(self):
         return """
@@ -63,24 +91,172 @@ class Frost(object):
                 kwargs[key] = ",".join(value)
         return kwargs
 
-    def make_request(self, method, **kwargs):
+    def make_request(self, method, object_hook=None, **kwargs):
         """
         Make an API request, with all kwargs passed through as URL params
+
+        :param function object_hook: Optional json object_hook called for
+            every object while the response is decoded
         """
         url = urljoin(self.base_url, method + '/' +
                       self.api_version + '.jsonld')
         response = self.session.get(
             url,
-            params=kwargs, timeout=60)
+            params=kwargs, timeout=self.timeout)
         if response.status_code < 200 or response.status_code > 500:
             response.raise_for_status()
-        json = response.json()
+        json = response.json(object_hook=object_hook)
         if 'data' in json:
             return json['data']
         if 'error' in json:
             raise APIError(json['error'])
         return json
 
+    def make_csv_request(self, method, **kwargs):
+        """
+        Make an API request for the CSV variant of a method, with all kwargs
+        passed through as URL params. Returns the response unread so the
+        body can be streamed.
+        """
+        url = urljoin(self.base_url, method + '/' +
+                      self.api_version + '.csv')
+        response = self.session.get(
+            url,
+            params=kwargs, timeout=self.timeout, stream=True)
+        if response.status_code < 200 or response.status_code > 500:
+            response.close()
+            response.raise_for_status()
+        if response.status_code != 200:
+            # errors are returned as json, other bodies are left to
+            # raise_for_status
+            try:
+                json = response.json()
+            except ValueError:
+                json = {}
+            finally:
+                response.close()
+            if 'error' in json:
+                raise APIError(json['error'])
+            response.raise_for_status()
+        response.raw.decode_content = True
+        return response
+
+    def is_element_error(self, error):
+        """Returns True if the API rejected a request because of its
+        elements, and not e.g. its sources or reference time"""
+        text = ('%s %s' % (error.message, error.reason)).lower()
+        return error.code in SPLIT_ERROR_CODES and 'element' in text
+
+    def make_request_by_elements(self, method, elements, **kwargs):
+        """
+        Make an API request for a list of elements. If the API rejects the
+        batch because of its elements it is split in halves and retried, so
+        a bad element only drops itself from the result. Other errors are
+        raised straight away.
+        """
+        try:
+            return self.make_request(method, elements=",".join(elements),
+                                     **kwargs)
+        except APIError as e:
+            if len(elements) < 2 or not self.is_element_error(e):
+                raise
+
+        failed = []
+        data = self.split_request_by_elements(method, elements, failed,
+                                              **kwargs)
+        if sum(len(part) for part, e in failed) == len(elements):
+            # nothing left, a missing data error says more than the
+            # error of the last bad element
+            no_data = [e for part, e in failed if not self.is_element_error(e)]
+            raise (no_data or [e for part, e in failed])[-1]
+        return data
+
+    def split_request_by_elements(self, method, elements, failed, **kwargs):
+        """Request each half of a list of elements, splitting further when
+        a half is rejected. Elements the API rejects on their own are
+        warned about, and halves without data count as empty. Both are
+        added to failed as (elements, error) pairs."""
+        half = len(elements) // 2
+        data = []
+        for part in (elements[:half], elements[half:]):
+            try:
+                data.extend(self.make_request(
+                    method, elements=",".join(part), **kwargs))
+            except APIError as e:
+                if self.is_element_error(e):
+                    if len(part) > 1:
+                        data.extend(self.split_request_by_elements(
+                            method, part, failed, **kwargs))
+                    else:
+                        warnings.warn('Dropped element %s: %s' %
+                                      (part[0], e.reason or e.message))
+                        failed.append((part, e))
+                elif e.code in (404, 412):
+                    # no data for these elements, keep the other halves
+                    failed.append((part, e))
+                else:
+                    raise
+        return data
+
+    def is_too_large(self, error):
+        """Returns True if a request failed because it asked for too much
+        data, either rejected by the API or timed out"""
+        if isinstance(error, requests.exceptions.Timeout):
+            return True
+        if isinstance(error, APIError):
+            reason = str(error.reason).lower()
+            return error.code == 413 or any(
+                w in reason for w in ('too large', 'too many', 'exceed'))
+        return False
+
+    def parse_referencetime(self, referencetime):
+        """Returns the start and end of a reference time interval like
+        '2018-01-01/2019-01-01' or '2018-01-01/now' as UTC datetimes,
+        naive times are taken as UTC"""
+        bounds = referencetime.split('/')
+        if len(bounds) != 2:
+            raise ValueError(
+                "referencetime must be an interval like "
+                "'2018-01-01/2019-01-01' or '2018-01-01/now', got %r"
+                % referencetime)
+        now = datetime.now(timezone.utc)
+        try:
+            return [now if b.strip().lower() == 'now' else _to_utc(b.strip())
+                    for b in bounds]
+        except ValueError:
+            raise ValueError(
+                'referencetime bounds must be ISO-8601 times or now, got %r'
+                % referencetime)
+
+    def observation_fields(self, columns=None, fields=None,
+                           quality_codes=None, level_values=None,
+                           time_window=None):
+        """Returns the fields to request from the observations endpoint,
+        either from the DataFrame columns you need or the fields you asked
+        for, with the fields the predicates need added. Returns None if
+        neither columns nor fields are given."""
+        if fields is not None:
+            fields = [f.strip() for f in _as_list(fields)]
+        elif columns is not None:
+            fields = ['sourceId', 'referenceTime']
+            for column in columns:
+                # nested columns like level.value come from the level field,
+                # stationId and source metadata are added by the client
+                field = column.split('.')[0]
+                if column != 'stationId' and field != 'source':
+                    fields.append(field)
+        else:
+            return None
+
+        if quality_codes is not None:
+            fields.append('qualityCode')
+        if level_values is not None:
+            fields.append('level')
+        if time_window is not None:
+            fields.append('referenceTime')
+        # drop repeated fields, keeping the order
+        return [f for i, f in enumerate(fields) if f not in fields[:i]]
+
     def get_sources(self, **kwargs):
         """Get metadata for the source entitites defined in the Frost API.
         Use the query parameters to filter the set of sources returned.
@@ -139,11 +315,135 @@ class Frost(object):
                                 )
         return SourcesResponse(res)
 
-    def get_available_timeseries(self, include_sourcemeta=False, **kwargs):
+    def get_sources_meta(self, ids):
+        """Get metadata for sources by station ID, using the client's
+        source index. Only IDs that have not been looked up before are
+        fetched from the API, so repeated calls with the same stations cost
+        no extra requests.
+
+        :param list ids: The station IDs to get metadata for, e.g. SN18700
+
+        :returns: :meth:`SourcesResponse`
+
+        :raises APIError: raises exception if error in the returned data.
+
+        """
+        ids = sorted(set(ids))
+        unknown = [i for i in ids if i not in self.sources_index]
+
+        if unknown:
+            try:
+                res = self.get_sources(ids=unknown)
+            except APIError as e:
+                if e.code != 404:
+                    raise
+            else:
+                for source in res.to_list():
+                    self.sources_index[source['id']] = source
+            # remember ids the API doesn't know about as well
+            for i in unknown:
+                self.sources_index.setdefault(i, None)
+
+        return SourcesResponse([self.sources_index[i] for i in ids
+                                if self.sources_index[i] is not None])
+
+    def get_elements(self, **kwargs):
+        """Get metadata for the weather and climate elements defined in the
+        Frost API. Use the query parameters to filter the set of elements
+        returned.
+
+        :param list/str ids: The element IDs to get metadata for
+        :param str names: The element names to get metadata for
+        :param str descriptions: The element descriptions to get
+            metadata for
+        :param str units: The unit names to get metadata for
+        :param str codetables: The code tables to get metadata for
+        :param str statuses: The statuses to get metadata for, e.g.
+            'CF-name'
+        :param str category: The category of elements to get metadata for
+        :param str fields: A  list of the fields that should be
+            present in the response.
+        :param str lang: The language of the element metadata, e.g. 'en-US'
+
+        :returns: :meth:`ElementsResponse`
+
+        :raises APIError: raises exception if error in the returned data or
+            not found.
+
+        :examples:
+
+            >>> f = Frost()
+            >>> f.get_elements(ids=['air_temperature'])
+
+        """
+
+        kwargs = self.stringify_kwargs(kwargs)
+
+        res = self.make_request('elements',
+                                **kwargs
+                                )
+        return ElementsResponse(res)
+
+    def normalize_element_id(self, element_id):
+        """Returns a lookup key for an element ID, ignoring case and
+        redundant whitespace, e.g. ' Sum( precipitation_amount  P1D)'
+        gives 'sum(precipitation_amount p1d)'"""
+        key = re.sub(r'\s+', ' ', element_id.strip())
+        key = re.sub(r'\(\s+', '(', key)
+        key = re.sub(r'\s+\)', ')', key)
+        return key.lower()
+
+    def get_elements_index(self):
+        """Returns the element catalogue as a dict of normalized element
+        IDs to element IDs. The catalogue is fetched once per client."""
+        if self.elements_index is None:
+            res = self.get_elements(fields=['id'])
+            self.elements_index = dict(
+                (self.normalize_element_id(i), i) for i in res.to_ids_list())
+        return self.elements_index
+
+    def validate_elements(self, elements):
+        """Validate element IDs against the element catalogue before
+        sending a request. Known elements are normalized to their Frost
+        API ID, unknown elements are dropped with a warning.
+
+        :param list/str elements: The element IDs to validate
+
+        :returns: list of valid element IDs
+
+        :raises ValueError: raises exception if none of the elements are
+            valid, no request is sent.
+
+        """
+        if not isinstance(elements, list):
+            elements = elements.split(',')
+
+        index = self.get_elements_index()
+        valid = []
+        invalid = []
+        for element in elements:
+            element_id = index.get(self.normalize_element_id(element))
+            if element_id is None:
+                invalid.append(element)
+            elif element_id not in valid:
+                valid.append(element_id)
+
+        if invalid:
+            warnings.warn('Unknown elements dropped: %s' % ",".join(invalid))
+        if not valid:
+            raise ValueError('No valid elements in %s' % ",".join(invalid))
+        return valid
+
+    def get_available_timeseries(self, include_sourcemeta=False,
+                                 validate_elements=False, **kwargs):
         """Find timeseries metadata by source and/or element
 
         :param bool include_sourcemeta: If True will return a tuple with time
             series and source meta.
+        :param bool validate_elements: If True the elements are checked
+            against the element catalogue before the request is sent, and
+            the request is split by element if the API rejects it because
+            of its elements.
         :param list/str sources: The ID(s) of the data sources to get time
             series for
         :param str referencetime: The time range to get time series for as
@@ -189,25 +489,57 @@ class Frost(object):
 
         """
 
-        kwargs = self.stringify_kwargs(kwargs)
-
-        res = self.make_request('observations/availableTimeSeries',
-                                **kwargs
-                                )
+        if validate_elements and 'elements' in kwargs:
+            elements = self.validate_elements(kwargs.pop('elements'))
+            kwargs = self.stringify_kwargs(kwargs)
+            res = self.make_request_by_elements('observations/availableTimeSeries',
+                                                elements,
+                                                **kwargs
+                                                )
+        else:
+            kwargs = self.stringify_kwargs(kwargs)
+            res = self.make_request('observations/availableTimeSeries',
+                                    **kwargs
+                                    )
 
         sources = None
 
         if include_sourcemeta:
-            source_ids = list(set([s["sourceId"].split(':')[0] for s in res]))
-            sources = self.get_sources(ids=source_ids)
+            source_ids = set([s["sourceId"].split(':')[0] for s in res])
+            sources = self.get_sources_meta(source_ids)
 
         return AvailableTimeSeriesResponse(res, sources=sources)
 
-    def get_observations(self, include_sourcemeta=False, **kwargs):
+    def get_observations(self, include_sourcemeta=False,
+                         validate_elements=False, columns=None,
+                         quality_codes=None, level_values=None,
+                         time_window=None, transport='jsonld', **kwargs):
         """Get observation data from the Frost API.
 
         :param bool include_sourcemeta: If True will return a tuple
             with time series and source meta.
+        :param bool validate_elements: If True the elements are checked
+            against the element catalogue before the request is sent, and
+            the request is split by element if the API rejects it because
+            of its elements. With transport='csv' the elements are only
+            checked, the request is not split.
+        :param list columns: The DataFrame columns you need, e.g.
+            ['value', 'referenceTime']. Sets the fields parameter so only
+            these are returned by the API.
+        :param list/str quality_codes: Only keep observations with these
+            quality codes, e.g. [0, 1, 2] or '0,1,2'
+        :param list/str level_values: Only keep observations at these
+            sensor levels, e.g. [2, 10]. Unlike levels, which is sent to the
+            API, this is checked by the client.
+        :param tuple time_window: Only keep observations with a reference
+            time from start up to end, as ISO-8601 strings or datetimes.
+
+        The quality_codes, level_values and time_window filters are applied
+        while the response is decoded, and the fields they need are added
+        to the fields parameter.
+        :param str transport: 'jsonld' or 'csv'. With 'csv' the smaller CSV
+            variant is requested and streamed straight into a DataFrame,
+            which requires Pandas.
         :param list/str sources: The ID(s) of the data sources to get
             observations for as a  list of Frost API station
             IDs, e.g. _SN18700_ for Blindern.
@@ -250,23 +582,213 @@ class Frost(object):
             list. If specified, only these fields are included in the output.
             If left out, all fields are included.
 
-        :returns: :meth:`ObservationsResponse`
+        :returns: :meth:`ObservationsResponse`, or
+            :meth:`ObservationsCSVResponse` with transport='csv'
 
         :raises APIError: raises exception if error in the returned data or
             not found.
 
         """
 
-        kwargs = self.stringify_kwargs(kwargs)
-
-        res = self.make_request('observations',
-                                **kwargs
-                                )
+        fields = self.observation_fields(
+            columns, kwargs.get('fields'), quality_codes, level_values,
+            time_window)
+        if fields is not None:
+            kwargs['fields'] = fields
+
+        if transport == 'csv':
+            try:
+                import pandas
+            except ImportError:
+                warnings.warn('Pandas dependency not found, please install with pip install frost-client[pandas] to enable the csv transport, using jsonld')
+            else:
+                return self.get_observations_csv(
+                    include_sourcemeta=include_sourcemeta,
+                    validate_elements=validate_elements,
+                    quality_codes=quality_codes, level_values=level_values,
+                    time_window=time_window, **kwargs)
+
+        object_hook = filter_observations_hook(
+            quality_codes, level_values, time_window)
+
+        if validate_elements and 'elements' in kwargs:
+            elements = self.validate_elements(kwargs.pop('elements'))
+            kwargs = self.stringify_kwargs(kwargs)
+            res = self.make_request_by_elements('observations',
+                                                elements,
+                                                object_hook=object_hook,
+                                                **kwargs
+                                                )
+        else:
+            kwargs = self.stringify_kwargs(kwargs)
+            res = self.make_request('observations',
+                                    object_hook=object_hook,
+                                    **kwargs
+                                    )
 
         sources = None
 
         if include_sourcemeta:
-            source_ids = list(set([s["sourceId"].split(':')[0] for s in res]))
-            sources = self.get_sources(ids=source_ids)
+            source_ids = set([s["sourceId"].split(':')[0] for s in res])
+            sources = self.get_sources_meta(source_ids)
 
         return ObservationsResponse(res, sources=sources)
+
+    def get_observations_csv(self, include_sourcemeta=False,
+                             validate_elements=False, quality_codes=None,
+                             level_values=None, time_window=None,
+                             **kwargs):
+        """Get observation data from the CSV variant of the observations
+        endpoint, see :meth:`get_observations` with transport='csv'.
+
+        With validate_elements the elements are checked against the element
+        catalogue, but unlike the jsonld transport a rejected request is not
+        split by element."""
+
+        if validate_elements and 'elements' in kwargs:
+            kwargs['elements'] = self.validate_elements(kwargs['elements'])
+        kwargs.setdefault('fields', CSV_FIELDS)
+        kwargs = self.stringify_kwargs(kwargs)
+
+        response = self.make_csv_request('observations',
+                                         **kwargs
+                                         )
+        try:
+            res = ObservationsCSVResponse.from_csv(
+                response.raw, quality_codes=quality_codes,
+                level_values=level_values, time_window=time_window)
+        finally:
+            response.close()
+
+        if include_sourcemeta:
+            res.sources = self.get_sources_meta(res.get_source_ids())
+
+        return res
+
+    def get_observations_adaptive(self, sources, referencetime,
+                                  include_sourcemeta=False, chunks=None,
+                                  columns=None, quality_codes=None,
+                                  level_values=None, time_window=None,
+                                  **kwargs):
+        """Get observation data for many sources and a long time range,
+        split into requests sized by an adaptive controller.
+
+        Each request covers a time window for a group of sources. The
+        window grows or shrinks to make each request take about the
+        controller's target time. A request the API rejects as too large,
+        or that times out, is retried with half the window, and when the
+        window can't shrink further the group of sources is split.
+
+        :param list/str sources: The ID(s) of the data sources to get
+            observations for.
+        :param str referencetime: The time range to get observations for
+            as an ISO-8601 interval, e.g. '2018-01-01/2019-01-01'.
+        :param bool include_sourcemeta: If True will include source meta.
+        :param AdaptiveChunkSize chunks: Controller for the window size in
+            hours. Pass the same controller to several calls to reuse what
+            it has learned. Defaults to 30 day windows aiming for 10 seconds
+            per request.
+        :param list columns: The DataFrame columns you need, e.g.
+            ['value', 'referenceTime']. Sets the fields parameter so only
+            these are returned by the API.
+        :param list/str quality_codes: Only keep observations with these
+            quality codes, e.g. [0, 1, 2] or '0,1,2'
+        :param list/str level_values: Only keep observations at these
+            sensor levels, e.g. [2, 10]. Unlike levels, which is sent to the
+            API, this is checked by the client.
+        :param tuple time_window: Only keep observations with a reference
+            time from start up to end, as ISO-8601 strings or datetimes.
+
+        The quality_codes, level_values and time_window filters are applied
+        while the response is decoded, and the fields they need are added
+        to the fields parameter.
+
+        All other parameters are sent to the API as query parameters, like
+        the API parameters of :meth:`get_observations`. The client options
+        validate_elements and transport are not supported.
+
+        :returns: :meth:`ObservationsResponse`
+
+        :raises APIError: raises exception if error in the returned data.
+        :raises ValueError: raises exception if referencetime is not an
+            interval, e.g. 'latest'.
+
+        """
+        unsupported = [o for o in CLIENT_OPTIONS if o in kwargs]
+        if unsupported:
+            raise TypeError(
+                'get_observations_adaptive does not support %s'
+                % ", ".join(unsupported))
+        if not isinstance(sources, list):
+            sources = sources.split(',')
+        if chunks is None:
+            chunks = AdaptiveChunkSize(initial=24 * 30)
+
+        start, end = self.parse_referencetime(referencetime)
+        fields = self.observation_fields(
+            columns, kwargs.get('fields'), quality_codes, level_values,
+            time_window)
+        if fields is not None:
+            kwargs['fields'] = fields
+        kwargs = self.stringify_kwargs(kwargs)
+
+        # count the observations in each response before they are filtered,
+        # the controller sizes requests by what the API returns
+        decoded = [0]
+        filter_hook = filter_observations_hook(
+            quality_codes, level_values, time_window)
+
+        def object_hook(d):
+            if 'observations' in d:
+                decoded[0] += len(d['observations'])
+            return filter_hook(d)
+
+        data = []
+        tasks = deque([(sources, start)])
+        while tasks:
+            group, cursor = tasks.popleft()
+            while cursor < end:
+                stop = min(end, cursor + timedelta(hours=chunks.size))
+                hours = max(1, int((stop - cursor).total_seconds() // 3600))
+                started = time.perf_counter()
+                decoded[0] = 0
+                try:
+                    res = self.make_request(
+                        'observations',
+                        object_hook=object_hook if filter_hook else None,
+                        sources=",".join(group),
+                        referencetime=cursor.strftime(TIME_FORMAT) + '/' +
+                        stop.strftime(TIME_FORMAT),
+                        **kwargs)
+                except (APIError, requests.exceptions.Timeout) as e:
+                    if isinstance(e, APIError) and e.code in (404, 412):
+                        # no observations in this window
+                        res = []
+                    elif not self.is_too_large(e):
+                        raise
+                    elif hours > chunks.minimum:
+                        chunks.shrink(hours)
+                        continue
+                    elif len(group) > 1:
+                        half = len(group) // 2
+                        tasks.appendleft((group[half:], cursor))
+                        tasks.appendleft((group[:half], cursor))
+                        break
+                    else:
+                        raise
+                elapsed = time.perf_counter() - started
+                if filter_hook:
+                    items = decoded[0]
+                else:
+                    items = sum(len(s.get('observations', [])) for s in res)
+                chunks.record(hours, elapsed, items)
+                data.extend(res)
+                cursor = stop
+
+        sources_meta = None
+
+        if include_sourcemeta:
+            source_ids = set([s["sourceId"].split(':')[0] for s in data])
+            sources_meta = self.get_sources_meta(source_ids)
+
+        return ObservationsResponse(data, sources=sources_meta)
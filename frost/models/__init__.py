@@ -1,3 +1,6 @@
 from .sources_response import SourcesResponse
 from .available_time_series_response import AvailableTimeSeriesResponse
 from .observations_response import ObservationsResponse
+from .elements_response import ElementsResponse
+from .observations_csv_response import ObservationsCSVResponse
+from .response_collection import ResponseCollection
@@ -1,4 +1,11 @@
 import pprint
+from .utils import join_sources, optimize_dtypes
+
+CATEGORY_COLUMNS = ["sourceId", "stationId", "elementId", "unit",
+                    "timeOffset", "timeResolution", "performanceCategory",
+                    "level.levelType", "level.unit"]
+INTEGER_COLUMNS = ["exposureCategory", "timeSeriesId", "level.value"]
+
 
 class AvailableTimeSeriesResponse(object):
 
@@ -17,12 +24,14 @@ class AvailableTimeSeriesResponse(object):
         """Returns the string representation of the data"""
         return pprint.pformat(self.series)
 
-    def to_df(self, compact=False):
+    def to_df(self, compact=False, optimize=False):
         """
         Returns a Pandas DataFrame representation of the model
 
         :param bool compact: If True returns a compact version with fewer
             columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals and codes and levels as small integers
         :param bool include_sourcemeta: If True will join in metadata
             (name etc) about the sources fewer columns
 
@@ -53,15 +62,16 @@ class AvailableTimeSeriesResponse(object):
             # create an extra column with normalized sourceId
             df["stationId"] = df['sourceId'].apply(lambda x: x.split(':')[0])
 
+            if optimize:
+                optimize_dtypes(df, CATEGORY_COLUMNS, INTEGER_COLUMNS)
+
             if compact:
                 df = df[compact_columns]
 
-            # if we have metadataon the sources, merge it in
+            # if we have metadataon the sources, join it in
             if self.sources:
-                sources_df = self.sources.to_df(compact=compact)
-                sources_df = sources_df.add_prefix('source.')
-                df = df.merge(sources_df, how="left", left_on="stationId",
-                            right_on="source.id")
+                df = join_sources(df, self.sources, compact=compact,
+                                  optimize=optimize)
 
             return df
 
@@ -0,0 +1,59 @@
+import pprint
+from .utils import optimize_dtypes
+
+CATEGORY_COLUMNS = ["@type", "unit", "status", "category",
+                    "calculationMethod.baseName",
+                    "calculationMethod.method",
+                    "calculationMethod.methodUnit"]
+
+
+class ElementsResponse(object):
+    """ Response object for elements endpoint """
+
+    def __init__(self, elements_json):
+        self.elements = elements_json
+
+    def to_str(self):
+        """Returns the string representation of the data"""
+        return pprint.pformat(self.elements)
+
+    def to_df(self, compact=False, optimize=False):
+        """
+        Returns a Pandas DataFrame representation of the model
+
+        :param bool compact: If True returns a compact version with fewer
+            columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals
+
+        """
+        try:
+            from pandas import json_normalize
+            import pandas as pd
+        except ImportError:
+            # dependency missing, issue a warning
+            import warnings
+            warnings.warn('Pandas dependency not found, please install with pip install frost-client[pandas] to enable to_df() feature')
+            return None
+        else:
+            compact_columns = ["id", "name", "description", "unit",
+                            "status", "category"]
+
+            df = json_normalize(self.elements)
+
+            if optimize:
+                optimize_dtypes(df, CATEGORY_COLUMNS)
+
+            if compact:
+                df = df[compact_columns]
+
+            return df
+
+    def to_list(self):
+        """Returns the elements as a Python list of dicts"""
+        return self.elements
+
+    def to_ids_list(self):
+        """Returns only element IDs as a Python list"""
+
+        return [e['id'] for e in self.elements]
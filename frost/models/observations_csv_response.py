@@ -0,0 +1,131 @@
+import pprint
+from .observations_response import (CATEGORY_COLUMNS, COMPACT_COLUMNS,
+                                    INTEGER_COLUMNS, OBSERVATION_COLUMNS)
+from .utils import filter_observations_df, join_sources, optimize_dtypes
+
+# the observation fields requested as CSV, in the order of the columns
+# of ObservationsResponse.to_df, where json_normalize puts nested fields
+# like level after the others
+CSV_FIELDS = ["elementId", "value", "unit", "timeOffset", "timeResolution",
+              "timeSeriesId", "performanceCategory", "exposureCategory",
+              "qualityCode", "level", "sourceId", "referenceTime"]
+
+# columns that are strings in the json version even when they look like
+# numbers in the CSV
+STRING_COLUMNS = ["exposureCategory", "performanceCategory"]
+
+
+class ObservationsCSVResponse(object):
+
+    """Observations read from the CSV variant of the observations endpoint.
+    The data is kept as a DataFrame with the same columns as
+    :meth:`ObservationsResponse.to_df`.
+    """
+
+    def __init__(self, df, sources=None):
+        """
+        Initialize a response class
+
+        :param DataFrame df: The observations
+        :param SourceResponse sources: Optional instance of sources response
+
+        """
+        self.df = df
+        self.sources = sources
+
+    @classmethod
+    def from_csv(cls, stream, sources=None, quality_codes=None,
+                 level_values=None, time_window=None):
+        """
+        Parse a CSV body straight into columns
+
+        :param stream: File like object with the CSV body, read as it
+            arrives
+        :param SourceResponse sources: Optional instance of sources response
+        :param list quality_codes: Only keep observations with these
+            quality codes
+        :param list level_values: Only keep observations at these sensor
+            levels
+        :param tuple time_window: Only keep observations with a reference
+            time from start up to end
+
+        :returns: :meth:`ObservationsCSVResponse`
+        """
+        import pandas as pd
+
+        try:
+            df = pd.read_csv(stream, skipinitialspace=True,
+                             dtype=dict((c, str) for c in STRING_COLUMNS))
+        except pd.errors.EmptyDataError:
+            # no body at all, return the columns without rows
+            df = pd.DataFrame(columns=OBSERVATION_COLUMNS)
+        df.columns = [c.strip() for c in df.columns]
+
+        # same column order as the json version, fields the API left out
+        # are skipped and unknown ones are kept at the end
+        order = []
+        for field in CSV_FIELDS:
+            order += [c for c in df.columns
+                      if c == field or c.startswith(field + '.')]
+        order += [c for c in df.columns if c not in order]
+        df = df.reindex(columns=order)
+
+        if 'referenceTime' in df.columns:
+            df['referenceTime'] = pd.to_datetime(df['referenceTime'],
+                                                 utc=True)
+
+        # create an extra column with normalized sourceId, splitting each
+        # distinct sourceId once
+        if 'sourceId' in df.columns:
+            station_ids = dict((s, s.split(':')[0])
+                               for s in df['sourceId'].unique())
+            df['stationId'] = df['sourceId'].map(station_ids)
+
+        df = filter_observations_df(df, quality_codes=quality_codes,
+                                    level_values=level_values,
+                                    time_window=time_window)
+        return cls(df, sources=sources)
+
+    def to_str(self):
+        """Returns the string representation of the data"""
+        return pprint.pformat(self.to_list())
+
+    def to_df(self, compact=False, optimize=False, float32=False):
+        """
+        Returns a Pandas DataFrame representation of the model
+
+        :param bool compact: If True returns a compact version with
+            fewer columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals and codes and levels as small integers
+        :param bool float32: If True stores the value column as float32
+
+        :returns: A copy of the observations, changing it doesn't change
+            the response
+
+        """
+        df = self.df.copy()
+        if optimize:
+            optimize_dtypes(df, CATEGORY_COLUMNS, INTEGER_COLUMNS)
+        if float32:
+            optimize_dtypes(df, float32_columns=["value"])
+
+        if compact:
+            # fields may have left some of them out
+            df = df[[c for c in COMPACT_COLUMNS if c in df.columns]]
+
+        # if we have metadataon the sources, join it in
+        if self.sources:
+            df = join_sources(df, self.sources, compact=compact,
+                              optimize=optimize)
+
+        return df
+
+    def to_list(self):
+        """Returns the observations as a Python list of dicts, one per
+        row"""
+        return self.df.to_dict('records')
+
+    def get_source_ids(self):
+        """Returns unique source ids as a list"""
+        return list(self.df['stationId'].unique())
@@ -1,4 +1,23 @@
 import pprint
+from .utils import join_sources, optimize_dtypes
+
+CATEGORY_COLUMNS = ["sourceId", "stationId", "elementId", "unit",
+                    "timeOffset", "timeResolution", "performanceCategory",
+                    "level.levelType", "level.unit"]
+INTEGER_COLUMNS = ["qualityCode", "exposureCategory", "timeSeriesId",
+                   "level.value"]
+
+# columns from json_normalize for all fields, nested fields like level
+# come after the others
+OBSERVATION_COLUMNS = ["elementId", "value", "unit", "timeOffset",
+                       "timeResolution", "timeSeriesId",
+                       "performanceCategory", "exposureCategory",
+                       "qualityCode", "level.levelType", "level.unit",
+                       "level.value", "sourceId", "referenceTime"]
+
+# columns kept by to_df(compact=True)
+COMPACT_COLUMNS = ["stationId", "sourceId", "referenceTime", "elementId",
+                   "value", "unit", "timeOffset", "timeResolution"]
 
 
 class ObservationsResponse(object):
@@ -18,33 +37,36 @@ class ObservationsResponse(object):
         """Returns the string representation of the data"""
         return pprint.pformat(self.series)
 
-    def to_df(self, compact=False):
+    def to_df(self, compact=False, optimize=False, float32=False):
         """
         Returns a Pandas DataFrame representation of the model
 
         :param bool compact: If True returns a compact version with
             fewer columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals and codes and levels as small integers
+        :param bool float32: If True stores the value column as float32
         :param bool include_sourcemeta: If True will join in
             metadata (name etc) about the sources fewer columns
 
         """
         try:
             import pandas as pd
-            from pandas.io.json import json_normalize
+            from pandas import json_normalize
         except ImportError:
             # dependency missing, issue a warning
             import warnings
             warnings.warn('Pandas dependency not found, please install with pip install frost-client[pandas] to enable to_df() feature')
             return None
         else:
-            compact_columns = ["stationId", "sourceId",
-                            "validFrom", "timeOffset",
-                            "timeResolution", "elementId",
-                            "unit"]
-
             df = json_normalize(self.series, 'observations', ['sourceId',
                                                             'referenceTime', ],
                                 errors='ignore')
+            if not len(df) and 'sourceId' not in df.columns:
+                # nothing found or everything filtered out, keep the columns
+                df = pd.DataFrame(columns=OBSERVATION_COLUMNS)
+                df['referenceTime'] = pd.to_datetime(df['referenceTime'],
+                                                     utc=True)
             # change date columns to datetime
             date_columns = ['referenceTime']
 
@@ -55,15 +77,19 @@ class ObservationsResponse(object):
             # create an extra column with normalized sourceId
             df["stationId"] = df['sourceId'].apply(lambda x: x.split(':')[0])
 
+            if optimize:
+                optimize_dtypes(df, CATEGORY_COLUMNS, INTEGER_COLUMNS)
+            if float32:
+                optimize_dtypes(df, float32_columns=["value"])
+
             if compact:
-                df = df[compact_columns]
+                # fields may have left some of them out
+                df = df[[c for c in COMPACT_COLUMNS if c in df.columns]]
 
-            # if we have metadataon the sources, merge it in
+            # if we have metadataon the sources, join it in
             if self.sources:
-                sources_df = self.sources.to_df(compact=compact)
-                sources_df = sources_df.add_prefix('source.')
-                df = df.merge(sources_df, how="left", left_on="stationId",
-                            right_on="source.id")
+                df = join_sources(df, self.sources, compact=compact,
+                                  optimize=optimize)
 
             return df
 
@@ -0,0 +1,290 @@
+from .observations_response import (CATEGORY_COLUMNS, COMPACT_COLUMNS,
+                                    INTEGER_COLUMNS, ObservationsResponse)
+from .sources_response import SourcesResponse
+from .utils import join_sources, optimize_dtypes
+
+# columns filled as float64 arrays, the rest are kept as objects
+NUMERIC_COLUMNS = ["value", "qualityCode", "timeSeriesId", "level.value"]
+
+# observation fields identifying an observation, used to drop duplicates
+# from overlapping responses. level is used when present, as not all
+# elements have a level
+KEY_FIELDS = ["elementId", "timeOffset", "timeResolution", "timeSeriesId"]
+
+
+def _flatten(d, prefix=''):
+    """Yields (column, value) pairs of a nested dict, with nested keys
+    joined by dots like json_normalize"""
+    for key, value in d.items():
+        if isinstance(value, dict):
+            for item in _flatten(value, prefix + key + '.'):
+                yield item
+        else:
+            yield prefix + key, value
+
+
+def _key(item, o):
+    missing = [f for f in KEY_FIELDS if f not in o]
+    if missing:
+        raise ValueError(
+            'Observations without %s can not be deduplicated, include them '
+            'in fields or use deduplicate=False' % ", ".join(missing))
+    level = o.get('level')
+    if isinstance(level, dict):
+        level = tuple(sorted(level.items()))
+    return (item['sourceId'], item['referenceTime'], level) + tuple(
+        o[f] for f in KEY_FIELDS)
+
+
+class ResponseCollection(object):
+
+    """Collection of observations responses from many requests
+
+    Conversion is deferred until the whole collection is converted, which
+    builds one DataFrame or Arrow table in a single pass over all the
+    responses, drops observations already in an earlier response and joins
+    in source metadata once.
+
+    Only :meth:`ObservationsResponse` is supported. Responses from
+    transport='csv' are already DataFrames, combine them with pandas.concat.
+
+    >>> collection = ResponseCollection()
+    >>> for chunk in chunks:
+    ...     collection.add(frost.get_observations(**chunk))
+    >>> df = collection.to_df()
+    """
+
+    def __init__(self, responses=None):
+        """
+        Initialize a collection
+
+        :param list responses: Optional list of :meth:`ObservationsResponse`
+
+        """
+        self.responses = []
+        for response in responses or []:
+            self.add(response)
+
+    def __len__(self):
+        return len(self.responses)
+
+    def __iter__(self):
+        return iter(self.responses)
+
+    def add(self, response):
+        """Add an :meth:`ObservationsResponse` to the collection"""
+        if not isinstance(response, ObservationsResponse):
+            raise TypeError(
+                'ResponseCollection only holds ObservationsResponse, got %s. '
+                'Combine csv responses with pandas.concat of their to_df()'
+                % type(response).__name__)
+        self.responses.append(response)
+
+    def extend(self, responses):
+        """Add a list of :meth:`ObservationsResponse` to the collection"""
+        for response in responses:
+            self.add(response)
+
+    def get_source_ids(self):
+        """Returns unique source ids of all responses as a list"""
+        return list(set([s["sourceId"].split(':')[0]
+                         for r in self.responses for s in r.series]))
+
+    def get_sources(self):
+        """Returns the source metadata of all responses as one
+        :meth:`SourcesResponse`, or None if no response has any"""
+        sources = {}
+        for response in self.responses:
+            if response.sources:
+                for source in response.sources.to_list():
+                    sources.setdefault(source['id'], source)
+        if not sources:
+            return None
+        return SourcesResponse(list(sources.values()))
+
+    def to_list(self, deduplicate=True):
+        """Returns the data elements of all responses as one Python list of
+        dicts
+
+        :param bool deduplicate: If True drops observations that are already
+            in an earlier response
+
+        :raises ValueError: raises exception if deduplicate is True and the
+            observations lack elementId, timeOffset, timeResolution or
+            timeSeriesId
+        """
+        # keys of the earlier responses, observations are only compared
+        # across responses, never within one
+        seen = set()
+        series = []
+        for response in self.responses:
+            keys = set()
+            for item in response.series:
+                observations = item.get('observations', [])
+                if deduplicate:
+                    kept = []
+                    for o in observations:
+                        key = _key(item, o)
+                        if key not in seen:
+                            keys.add(key)
+                            kept.append(o)
+                    if not kept:
+                        continue
+                    if len(kept) < len(observations):
+                        item = dict(item, observations=kept)
+                series.append(item)
+            seen |= keys
+        return series
+
+    def to_columns(self, deduplicate=True):
+        """
+        Returns the observations of all responses as columns, in a single
+        pass into preallocated arrays
+
+        :param bool deduplicate: If True drops observations that are already
+            in an earlier response
+
+        :returns: dict of column names to numpy arrays, in the column order
+            of :meth:`ObservationsResponse.to_df`
+
+        :raises ValueError: raises exception if deduplicate is True and the
+            observations lack elementId, timeOffset, timeResolution or
+            timeSeriesId
+        """
+        import numpy as np
+
+        size = sum(len(item.get('observations', []))
+                   for r in self.responses for item in r.series)
+
+        def allocate(column):
+            if column in NUMERIC_COLUMNS:
+                return np.full(size, np.nan)
+            return np.full(size, None, dtype=object)
+
+        columns = {}
+        source_ids = allocate('sourceId')
+        reference_times = allocate('referenceTime')
+        station_ids = allocate('stationId')
+
+        # keys of the earlier responses, observations are only compared
+        # across responses, never within one
+        seen = set()
+        row = 0
+        for response in self.responses:
+            keys = set()
+            for item in response.series:
+                source_id = item['sourceId']
+                reference_time = item['referenceTime']
+                station_id = source_id.split(':')[0]
+                for o in item.get('observations', []):
+                    if deduplicate:
+                        key = _key(item, o)
+                        if key in seen:
+                            continue
+                        keys.add(key)
+                    for column, value in _flatten(o):
+                        if column not in columns:
+                            columns[column] = allocate(column)
+                        columns[column][row] = value
+                    source_ids[row] = source_id
+                    reference_times[row] = reference_time
+                    station_ids[row] = station_id
+                    row += 1
+            seen |= keys
+
+        # json_normalize puts nested columns like level.value after the
+        # others
+        order = [c for c in columns if '.' not in c] + \
+            [c for c in columns if '.' in c]
+        columns = dict((c, columns[c]) for c in order)
+        columns['sourceId'] = source_ids
+        columns['referenceTime'] = reference_times
+        columns['stationId'] = station_ids
+
+        # slicing returns views, duplicates leave unused rows at the end
+        return dict((c, a[:row]) for c, a in columns.items())
+
+    def to_df(self, compact=False, optimize=False, float32=False,
+              deduplicate=True):
+        """
+        Returns a Pandas DataFrame of all responses, with the same columns
+        as :meth:`ObservationsResponse.to_df`
+
+        :param bool compact: If True returns a compact version with
+            fewer columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals and codes and levels as small integers
+        :param bool float32: If True stores the value column as float32
+        :param bool deduplicate: If True drops observations that are
+            already in an earlier response
+
+        :raises ValueError: raises exception if deduplicate is True and the
+            observations lack elementId, timeOffset, timeResolution or
+            timeSeriesId
+
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            # dependency missing, issue a warning
+            import warnings
+            warnings.warn('Pandas dependency not found, please install with pip install frost-client[pandas] to enable to_df() feature')
+            return None
+        else:
+            columns = self.to_columns(deduplicate=deduplicate)
+            columns['referenceTime'] = pd.to_datetime(
+                columns['referenceTime'])
+            df = pd.DataFrame(columns)
+
+            # whole numbers are stored as integers when nothing is missing,
+            # like json_normalize does
+            for c in NUMERIC_COLUMNS:
+                if c in df.columns and c != 'value' and \
+                        df[c].notnull().all() and (df[c] % 1 == 0).all():
+                    df[c] = df[c].astype('int64')
+
+            if optimize:
+                optimize_dtypes(df, CATEGORY_COLUMNS, INTEGER_COLUMNS)
+            if float32:
+                optimize_dtypes(df, float32_columns=["value"])
+
+            if compact:
+                # fields may have left some of them out
+                df = df[[c for c in COMPACT_COLUMNS if c in df.columns]]
+
+            # source metadata is joined once for all responses
+            sources = self.get_sources()
+            if sources:
+                df = join_sources(df, sources, compact=compact,
+                                  optimize=optimize)
+
+            return df
+
+    def to_arrow(self, deduplicate=True):
+        """
+        Returns an Arrow table of all responses, with the same columns as
+        :meth:`ResponseCollection.to_df` without source metadata
+
+        :param bool deduplicate: If True drops observations that are
+            already in an earlier response
+
+        :raises ValueError: raises exception if deduplicate is True and the
+            observations lack elementId, timeOffset, timeResolution or
+            timeSeriesId
+
+        """
+        try:
+            import pandas as pd
+            import pyarrow as pa
+        except ImportError:
+            # dependency missing, issue a warning
+            import warnings
+            warnings.warn('Pyarrow dependency not found, please install with pip install frost-client[arrow] to enable to_arrow() feature')
+            return None
+        else:
+            columns = self.to_columns(deduplicate=deduplicate)
+            columns['referenceTime'] = pd.to_datetime(
+                columns['referenceTime'])
+            return pa.table(dict(
+                (c, pa.array(a, from_pandas=True))
+                for c, a in columns.items()))
@@ -1,4 +1,9 @@
 import pprint
+from .utils import optimize_dtypes
+
+CATEGORY_COLUMNS = ["@type", "country", "countryCode", "county",
+                    "municipality"]
+INTEGER_COLUMNS = ["countyId", "municipalityId", "wmoId"]
 
 
 class SourcesResponse(object):
@@ -11,16 +16,18 @@ class SourcesResponse(object):
         """Returns the string representation of the data"""
         return pprint.pformat(self.sources)
 
-    def to_df(self, compact=False):
+    def to_df(self, compact=False, optimize=False):
         """
         Returns a Pandas DataFrame representation of the model
 
         :param bool compact: If True returns a compact version with fewer
             columns
+        :param bool optimize: If True stores repeated strings as
+            categoricals and ids as small integers
 
         """
         try:
-            from pandas.io.json import json_normalize
+            from pandas import json_normalize
             import pandas as pd
         except ImportError:
             # dependency missing, issue a warning
@@ -41,8 +48,12 @@ class SourcesResponse(object):
                 if c in df.columns:
                     df[c] = pd.to_datetime(df[c], errors='coerce')
 
+            if optimize:
+                optimize_dtypes(df, CATEGORY_COLUMNS, INTEGER_COLUMNS)
+
             if compact:
-                return df[compact_columns]
+                df = df[compact_columns]
+
             return df
 
     def to_list(self):
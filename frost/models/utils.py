@@ -0,0 +1,222 @@
+from datetime import datetime, timezone
+
+
+def _to_utc(value):
+    """Returns a timezone aware datetime for an ISO-8601 string or a
+    datetime, naive times are taken as UTC"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _downcast_integer(pd, series):
+    """
+    Downcast a column to the smallest integer type that holds its values.
+
+    Columns with missing values get the matching nullable pandas type
+    (Int8, Int16 ...). Columns with fractional values fall back to float32.
+    Returns None if the column is not numeric.
+    """
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.isnull().sum() > series.isnull().sum():
+        # some values are not numbers, leave the column alone
+        return None
+
+    present = numeric.dropna()
+    if len(present) and not (present % 1 == 0).all():
+        return numeric.astype('float32')
+
+    dtype = pd.to_numeric(present.astype('int64'),
+                          downcast='integer').dtype
+    if numeric.isnull().any():
+        # capitalized name is the nullable variant, e.g. int8 -> Int8
+        return numeric.astype(dtype.name.capitalize())
+    return numeric.astype(dtype)
+
+
+def optimize_dtypes(df, category_columns=(), integer_columns=(),
+                    float32_columns=()):
+    """
+    Convert the columns of a DataFrame to memory efficient dtypes
+
+    :param DataFrame df: The DataFrame to convert, changed in place
+    :param list category_columns: Columns with repeated strings, stored as
+        categoricals
+    :param list integer_columns: Columns with codes and levels, stored as
+        the smallest integer type that fits
+    :param list float32_columns: Columns stored as float32
+
+    :returns: The converted DataFrame
+    """
+    import pandas as pd
+
+    for c in category_columns:
+        if c in df.columns and (df[c].dtype == object or
+                                pd.api.types.is_string_dtype(df[c].dtype)):
+            try:
+                df[c] = df[c].astype('category')
+            except TypeError:
+                # unhashable values like lists can't be categories
+                pass
+
+    for c in integer_columns:
+        if c in df.columns:
+            converted = _downcast_integer(pd, df[c])
+            if converted is not None:
+                df[c] = converted
+
+    for c in float32_columns:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors='coerce').astype('float32')
+
+    return df
+
+
+def join_sources(df, sources, compact=False, optimize=False):
+    """
+    Join metadata about the sources into a DataFrame on stationId
+
+    Each station is looked up once in a hashed index of the sources, and
+    the result is expanded by the factorized station codes instead of
+    doing a full merge.
+
+    :param DataFrame df: DataFrame with a stationId column
+    :param SourcesResponse sources: The sources to join in
+    :param bool compact: If True joins in fewer source columns
+    :param bool optimize: If True uses memory efficient source dtypes
+
+    :returns: DataFrame with the source columns prefixed with source.
+    """
+    import pandas as pd
+
+    sources_df = sources.to_df(compact=compact, optimize=optimize)
+    if 'id' not in sources_df.columns:
+        # no metadata found for any of the stations
+        return df
+    sources_df = sources_df.drop_duplicates('id').set_index('id', drop=False)
+
+    codes, uniques = pd.factorize(df['stationId'])
+    if (codes >= 0).all() and pd.Index(uniques).isin(sources_df.index).all():
+        lookup = sources_df.reindex(list(uniques))
+    else:
+        # missing stations get an empty row, integer columns are made
+        # nullable so the empty row doesn't turn them into floats
+        for c in sources_df.columns:
+            dtype = sources_df[c].dtype
+            if dtype.kind in 'iu' and dtype.name == dtype.name.lower():
+                sources_df[c] = sources_df[c].astype(dtype.name.capitalize())
+        # the trailing None gives the empty row for code -1
+        lookup = sources_df.reindex(list(uniques) + [None])
+    joined = lookup.iloc[codes].add_prefix('source.')
+    joined.index = df.index
+
+    return pd.concat([df, joined], axis=1)
+
+
+def _as_list(values):
+    """Returns a list for a list or a comma separated string"""
+    if isinstance(values, str):
+        return [v for v in values.split(',') if v.strip()]
+    return list(values)
+
+
+def item_filter(quality_codes=None, level_values=None, time_window=None):
+    """
+    Returns a function that filters one observations item in place
+
+    The function removes the observations that don't match all the given
+    predicates and returns False if the item should be dropped, because its
+    reference time is outside the time window or no observations are left.
+    Returns None if no predicates are given.
+
+    :param list/str quality_codes: Quality codes to keep, e.g. [0, 1, 2]
+    :param list/str level_values: Sensor level values to keep, e.g. [2, 10]
+    :param tuple time_window: Start and end of the reference times to keep,
+        as ISO-8601 strings or datetimes. The end is not included.
+    """
+    if quality_codes is None and level_values is None and time_window is None:
+        return None
+
+    if quality_codes is not None:
+        quality_codes = set(int(q) for q in _as_list(quality_codes))
+    if level_values is not None:
+        level_values = set(float(l) for l in _as_list(level_values))
+    if time_window is not None:
+        start, end = [_to_utc(t) for t in time_window]
+
+    def keep(o):
+        if quality_codes is not None and \
+                o.get('qualityCode') not in quality_codes:
+            return False
+        if level_values is not None:
+            level = o.get('level', {}).get('value')
+            if level is None or float(level) not in level_values:
+                return False
+        return True
+
+    def keep_item(item):
+        if time_window is not None:
+            reference_time = _to_utc(item['referenceTime'])
+            if reference_time < start or reference_time >= end:
+                return False
+        observations = [o for o in item.get('observations', []) if keep(o)]
+        item['observations'] = observations
+        return len(observations) > 0
+
+    return keep_item
+
+
+def filter_observations_hook(quality_codes=None, level_values=None,
+                             time_window=None):
+    """
+    Returns a json object_hook that filters observations while a response
+    is decoded
+
+    Each item is filtered as soon as it is decoded, so observations that
+    don't match are dropped before the rest of the response is read and
+    never kept in the returned data. Takes the same predicates as
+    :func:`item_filter`, returns None if no predicates are given.
+    """
+    keep_item = item_filter(quality_codes, level_values, time_window)
+    if keep_item is None:
+        return None
+
+    def hook(d):
+        if isinstance(d.get('observations'), list):
+            # dropped items are removed when the data list is decoded
+            return d if keep_item(d) else None
+        if isinstance(d.get('data'), list):
+            d['data'] = [i for i in d['data'] if i is not None]
+        return d
+
+    return hook
+
+
+def filter_observations_df(df, quality_codes=None, level_values=None,
+                           time_window=None):
+    """
+    Filter a DataFrame of observations with column masks, the columnar
+    version of :func:`item_filter` with the same predicates.
+
+    :returns: DataFrame with the matching rows
+    """
+    if quality_codes is None and level_values is None and time_window is None:
+        return df
+
+    import pandas as pd
+
+    mask = pd.Series(True, index=df.index)
+    if quality_codes is not None:
+        mask &= df['qualityCode'].isin(
+            [int(q) for q in _as_list(quality_codes)])
+    if level_values is not None:
+        if 'level.value' not in df.columns:
+            return df.iloc[:0]
+        mask &= df['level.value'].isin(
+            [float(l) for l in _as_list(level_values)])
+    if time_window is not None:
+        start, end = [_to_utc(t) for t in time_window]
+        mask &= (df['referenceTime'] >= start) & (df['referenceTime'] < end)
+    return df[mask].reset_index(drop=True)
@@ -0,0 +1,65 @@
+import unittest
+
+from frost.adaptive import AdaptiveChunkSize
+
+
+class TestAdaptiveChunkSize(unittest.TestCase):
+
+    def test_grows_when_fast(self):
+        chunks = AdaptiveChunkSize(initial=100, target_seconds=10)
+        self.assertEqual(chunks.record(100, 1, 100), 200)
+        self.assertEqual(chunks.record(200, 2, 200), 400)
+
+    def test_shrinks_when_slow(self):
+        chunks = AdaptiveChunkSize(initial=100, target_seconds=10)
+        self.assertEqual(chunks.record(100, 20, 100), 50)
+
+    def test_limits_items(self):
+        chunks = AdaptiveChunkSize(initial=100, target_seconds=10,
+                                   max_items=1000)
+        self.assertEqual(chunks.record(100, 1, 500), 200)
+        chunks = AdaptiveChunkSize(initial=100, target_seconds=10,
+                                   max_items=1000)
+        self.assertEqual(chunks.record(100, 1, 5000), 20)
+
+    def test_clamps_size(self):
+        chunks = AdaptiveChunkSize(initial=100, minimum=10, maximum=150,
+                                   smoothing=1)
+        self.assertEqual(chunks.record(100, 0.1, 10), 150)
+        self.assertEqual(chunks.record(150, 1000, 10), 10)
+
+    def test_shrink(self):
+        chunks = AdaptiveChunkSize(initial=100, minimum=10)
+        self.assertEqual(chunks.shrink(100), 50)
+        self.assertEqual(chunks.shrink(50), 25)
+        self.assertEqual(chunks.shrink(15), 10)
+
+    def test_remembers_rejected_size(self):
+        chunks = AdaptiveChunkSize(initial=100, target_seconds=10)
+        rejected = 0
+        for i in range(30):
+            size = chunks.size
+            if size > 30:
+                # the server rejects chunks larger than 30
+                rejected += 1
+                chunks.shrink(size)
+            else:
+                chunks.record(size, 0.1, size)
+        self.assertEqual(chunks.size, 30)
+        self.assertLessEqual(rejected, 6)
+
+    def test_rejected_size_is_not_accepted(self):
+        chunks = AdaptiveChunkSize(initial=48, target_seconds=10)
+        self.assertEqual(chunks.record(48, 0.1, 48), 96)
+        self.assertEqual(chunks.shrink(96), 48)
+        self.assertEqual(chunks.record(48, 0.1, 48), 72)
+        self.assertEqual(chunks.shrink(72), 48)
+        self.assertEqual(chunks.limit, 71)
+
+    def test_minimum(self):
+        with self.assertRaises(ValueError):
+            AdaptiveChunkSize(initial=10, minimum=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
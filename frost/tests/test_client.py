@@ -0,0 +1,178 @@
+import unittest
+from datetime import datetime, timedelta
+
+from frost.adaptive import AdaptiveChunkSize
+from frost.client import APIError, Frost, TIME_FORMAT
+from frost.models import SourcesResponse
+
+
+def source(i):
+    return {'id': i, 'name': i, 'shortName': i, 'county': 'VESTLAND',
+            'countyId': 46, 'municipality': 'BERGEN', 'municipalityId': 4601}
+
+
+class TestSourcesMeta(unittest.TestCase):
+
+    def setUp(self):
+        self.f = Frost(username='test')
+        self.requested = []
+
+        def get_sources(ids):
+            self.requested.append(sorted(ids))
+            return SourcesResponse([source(i) for i in ids if i != 'SN0'])
+
+        self.f.get_sources = get_sources
+
+    def test_only_unknown_ids_are_fetched(self):
+        res = self.f.get_sources_meta(['SN50500', 'SN50540'])
+        self.assertEqual(sorted(res.to_ids_list()), ['SN50500', 'SN50540'])
+        res = self.f.get_sources_meta(['SN50540'])
+        self.assertEqual(res.to_ids_list(), ['SN50540'])
+        self.f.get_sources_meta(['SN50540', 'SN18700'])
+        self.assertEqual(self.requested,
+                         [['SN50500', 'SN50540'], ['SN18700']])
+
+    def test_unknown_ids_are_remembered(self):
+        res = self.f.get_sources_meta(['SN0', 'SN50540'])
+        self.assertEqual(res.to_ids_list(), ['SN50540'])
+        self.f.get_sources_meta(['SN0'])
+        self.assertEqual(self.requested, [['SN0', 'SN50540']])
+
+
+class TestRequestByElements(unittest.TestCase):
+
+    def setUp(self):
+        self.f = Frost(username='test')
+        self.requests = []
+
+        def make_request(method, elements=None, **kwargs):
+            elements = elements.split(',')
+            self.requests.append(elements)
+            if 'badsource' in kwargs.get('sources', ''):
+                raise APIError({'code': 400, 'message': 'Bad Request',
+                                'reason': 'Invalid value for sources'})
+            if any(e.startswith('bad') for e in elements):
+                raise APIError({'code': 400, 'message': 'Bad Request',
+                                'reason': 'Invalid value for elements'})
+            data = [{'elementId': e} for e in elements if e != 'nodata']
+            if not data:
+                raise APIError({'code': 412, 'message': '412',
+                                'reason': 'No time series found'})
+            return data
+
+        self.f.make_request = make_request
+
+    def test_bad_element_is_dropped(self):
+        with self.assertWarnsRegex(UserWarning, 'bad'):
+            data = self.f.make_request_by_elements(
+                'observations', ['good', 'x', 'bad'])
+        self.assertEqual([d['elementId'] for d in data], ['good', 'x'])
+
+    def test_bad_and_no_data(self):
+        with self.assertWarnsRegex(UserWarning, 'bad'):
+            data = self.f.make_request_by_elements(
+                'observations', ['good', 'x', 'bad', 'nodata'])
+        self.assertEqual([d['elementId'] for d in data], ['good', 'x'])
+
+    def test_no_element_left(self):
+        with self.assertWarns(UserWarning):
+            with self.assertRaises(APIError) as cm:
+                self.f.make_request_by_elements('observations',
+                                                ['bad1', 'bad2'])
+        self.assertEqual(cm.exception.code, 400)
+        with self.assertWarns(UserWarning):
+            with self.assertRaises(APIError) as cm:
+                self.f.make_request_by_elements('observations',
+                                                ['bad', 'nodata'])
+        self.assertEqual(cm.exception.code, 412)
+
+    def test_other_errors_are_not_split(self):
+        with self.assertRaises(APIError):
+            self.f.make_request_by_elements(
+                'observations', ['good', 'bad'], sources='badsource')
+        self.assertEqual(self.requests, [['good', 'bad']])
+
+
+class TestObservationsAdaptive(unittest.TestCase):
+
+    def setUp(self):
+        self.f = Frost(username='test')
+        self.requests = []
+        # the stubbed API rejects more than max_hours hours of
+        # max_sources sources and has no data in no_data
+        self.max_hours = None
+        self.max_sources = None
+        self.no_data = ()
+
+        def make_request(method, object_hook=None, sources=None,
+                         referencetime=None, **kwargs):
+            sources = sources.split(',')
+            start, end = [datetime.strptime(t, TIME_FORMAT)
+                          for t in referencetime.split('/')]
+            hours = int((end - start).total_seconds() // 3600)
+            too_large = (self.max_hours and hours > self.max_hours) or \
+                (self.max_sources and len(sources) > self.max_sources)
+            self.requests.append((sources, hours, not too_large))
+            if too_large:
+                raise APIError({'code': 413, 'message': 'Too Large',
+                                'reason': 'The response is too large'})
+            data = []
+            for i in range(hours):
+                t = start + timedelta(hours=i)
+                if t.strftime('%Y-%m') in self.no_data:
+                    continue
+                data.extend({'sourceId': s + ':0',
+                             'referenceTime': t.strftime(TIME_FORMAT),
+                             'observations': [{'value': 1.0}]}
+                            for s in sources)
+            if not data:
+                raise APIError({'code': 412, 'message': '412',
+                                'reason': 'No time series found'})
+            return data
+
+        self.f.make_request = make_request
+
+    def hours(self, res, source='SN1'):
+        return [s['referenceTime'] for s in res.series
+                if s['sourceId'].startswith(source + ':')]
+
+    def test_shrinks_too_large_windows(self):
+        self.max_hours = 24
+        res = self.f.get_observations_adaptive(
+            ['SN1'], '2018-01-01/2018-02-01',
+            chunks=AdaptiveChunkSize(initial=24 * 7))
+        times = self.hours(res)
+        self.assertEqual(len(times), 31 * 24)
+        self.assertEqual(len(set(times)), 31 * 24)
+        rejected = [r for r in self.requests if not r[2]]
+        self.assertLessEqual(len(rejected), 8)
+        # once the limit is found no request is rejected
+        self.assertTrue(all(r[2] for r in self.requests[-10:]))
+
+    def test_splits_sources(self):
+        self.max_sources = 1
+        res = self.f.get_observations_adaptive(
+            ['SN1', 'SN2', 'SN3'], '2018-01-01/2018-01-03',
+            chunks=AdaptiveChunkSize(initial=48, minimum=48))
+        for source in ('SN1', 'SN2', 'SN3'):
+            self.assertEqual(len(self.hours(res, source)), 48)
+        self.assertEqual([r[0] for r in self.requests if r[2]],
+                         [['SN1'], ['SN2'], ['SN3']])
+
+    def test_windows_without_data(self):
+        self.no_data = ('2018-01',)
+        res = self.f.get_observations_adaptive(
+            ['SN1'], '2018-01-01/2018-03-01',
+            chunks=AdaptiveChunkSize(initial=24 * 10))
+        times = self.hours(res)
+        self.assertEqual(len(times), 28 * 24)
+        self.assertTrue(all(t.startswith('2018-02') for t in times))
+
+        self.no_data = ('2018-01', '2018-02')
+        res = self.f.get_observations_adaptive(
+            ['SN1'], '2018-01-01/2018-03-01')
+        self.assertEqual(res.series, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import copy
+import json
+import os
+import unittest
+
+from frost.models import (ObservationsCSVResponse, ObservationsResponse,
+                          ResponseCollection)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class TestResponseCollection(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(FIXTURES, 'observations.json')) as f:
+            self.series = json.load(f)['data']
+
+    def response(self, series):
+        return ObservationsResponse(copy.deepcopy(series))
+
+    def test_same_frame_as_single_response(self):
+        collection = ResponseCollection([self.response(self.series)])
+        df = collection.to_df()
+        single = self.response(self.series).to_df()
+        self.assertEqual(list(df.columns), list(single.columns))
+        self.assertEqual(list(df['value']), list(single['value']))
+        self.assertEqual(list(df['referenceTime']),
+                         list(single['referenceTime']))
+
+    def test_compact(self):
+        collection = ResponseCollection([self.response(self.series)])
+        df = collection.to_df(compact=True)
+        single = self.response(self.series).to_df(compact=True)
+        self.assertEqual(list(df.columns), list(single.columns))
+        self.assertEqual(list(df['value']), list(single['value']))
+
+    def test_deduplicates_across_responses(self):
+        # the second response overlaps the last two items of the first
+        collection = ResponseCollection([
+            self.response(self.series),
+            self.response(self.series[2:])])
+        self.assertEqual(len(collection.to_df()), 8)
+        self.assertEqual(len(collection.to_df(deduplicate=False)), 12)
+        self.assertEqual(
+            sum(len(i['observations']) for i in collection.to_list()), 8)
+
+    def test_keeps_duplicates_within_response(self):
+        collection = ResponseCollection([
+            self.response(self.series + self.series[:1])])
+        self.assertEqual(len(collection.to_df()), 10)
+
+    def test_projected_observations(self):
+        projected = [{'sourceId': 'SN50540:0', 'referenceTime': 't',
+                      'observations': [{'value': 1.0}, {'value': 5.0}]}]
+        collection = ResponseCollection([self.response(projected)])
+        with self.assertRaises(ValueError):
+            collection.to_list()
+        values = [o['value'] for i in collection.to_list(deduplicate=False)
+                  for o in i['observations']]
+        self.assertEqual(values, [1.0, 5.0])
+
+    def test_to_arrow(self):
+        collection = ResponseCollection([self.response(self.series)])
+        table = collection.to_arrow()
+        self.assertEqual(table.num_rows, 8)
+        self.assertIn('level.value', table.column_names)
+
+    def test_rejects_csv_responses(self):
+        with self.assertRaises(TypeError):
+            ResponseCollection().add(ObservationsCSVResponse(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import unittest
+
+import requests
+from pandas import DataFrame
+
+from frost.client import Frost
+from frost.models import ObservationsCSVResponse, ObservationsResponse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+
+class TestObservationsCSV(unittest.TestCase):
+
+    def setUp(self):
+        self.json_df = ObservationsResponse(
+            json.loads(fixture('observations.json'))['data']).to_df()
+
+    def test_same_schema_as_json(self):
+        res = ObservationsCSVResponse.from_csv(
+            io.StringIO(fixture('observations.csv')))
+        df = res.to_df()
+        self.assertEqual(list(df.columns), list(self.json_df.columns))
+        self.assertEqual(list(df.dtypes), list(self.json_df.dtypes))
+        self.assertEqual(len(df), len(self.json_df))
+        self.assertEqual(list(df['value']), list(self.json_df['value']))
+
+    def test_filters(self):
+        res = ObservationsCSVResponse.from_csv(
+            io.StringIO(fixture('observations.csv')),
+            quality_codes='0,1', level_values=[2],
+            time_window=('2018-01-01T01:00', '2018-01-02'))
+        df = res.to_df()
+        self.assertEqual(len(df), 2)
+        self.assertEqual(set(df['elementId']), set(['air_temperature']))
+
+    def test_empty_body(self):
+        res = ObservationsCSVResponse.from_csv(io.StringIO(''))
+        df = res.to_df()
+        self.assertIsInstance(df, DataFrame)
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), list(self.json_df.columns))
+
+    def test_header_only_body(self):
+        header = fixture('observations.csv').splitlines()[0]
+        res = ObservationsCSVResponse.from_csv(io.StringIO(header + '\n'))
+        self.assertEqual(len(res.to_df()), 0)
+        self.assertEqual(res.get_source_ids(), [])
+
+    def test_compact(self):
+        res = ObservationsCSVResponse.from_csv(
+            io.StringIO(fixture('observations.csv')))
+        df = res.to_df(compact=True)
+        json_df = ObservationsResponse(
+            json.loads(fixture('observations.json'))['data']).to_df(
+                compact=True)
+        self.assertEqual(list(df.columns), list(json_df.columns))
+        self.assertIn('value', df.columns)
+        self.assertEqual(len(df), len(self.json_df))
+
+    def test_to_df_returns_a_copy(self):
+        res = ObservationsCSVResponse.from_csv(
+            io.StringIO(fixture('observations.csv')))
+        df = res.to_df()
+        self.assertIsNot(df, res.df)
+        df['value'] = 0
+        self.assertFalse((res.df['value'] == 0).all())
+
+    def test_error_body_not_json(self):
+        response = requests.Response()
+        response.status_code = 500
+        response.raw = io.BytesIO(b'<html>Internal error</html>')
+        closed = []
+        response.close = lambda: closed.append(True)
+        f = Frost(username='test')
+        f.session.get = lambda *args, **kwargs: response
+        with self.assertRaises(requests.exceptions.HTTPError):
+            f.make_csv_request('observations')
+        self.assertEqual(closed, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import unittest
+
+from frost.models import ObservationsResponse, SourcesResponse
+from frost.models.observations_response import OBSERVATION_COLUMNS
+from frost.models.utils import filter_observations_hook
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture_series():
+    with open(os.path.join(FIXTURES, 'observations.json')) as f:
+        return json.load(f)['data']
+
+
+class TestObservationsResponse(unittest.TestCase):
+
+    def test_optimized_memory(self):
+        # memory regression benchmark, optimized frames should stay
+        # well below a quarter of the default footprint
+        series = []
+        for day in range(1, 29):
+            for item in fixture_series():
+                item['referenceTime'] = item['referenceTime'].replace(
+                    '2018-01-01', '2018-02-%02d' % day)
+                series.append(item)
+        res = ObservationsResponse(series * 50)
+        df = res.to_df()
+        df_optimized = res.to_df(optimize=True, float32=True)
+        self.assertEqual(len(df), len(df_optimized))
+        self.assertGreater(len(df), 10000)
+        default_bytes = df.memory_usage(deep=True).sum()
+        optimized_bytes = df_optimized.memory_usage(deep=True).sum()
+        self.assertLess(optimized_bytes, default_bytes / 4)
+
+    def test_join_sources_keeps_integer_dtypes(self):
+        sources = SourcesResponse([
+            {'id': 'SN50540', 'name': 'BERGEN - FLORIDA',
+             'shortName': 'Florida', 'county': 'VESTLAND', 'countyId': 46,
+             'municipality': 'BERGEN', 'municipalityId': 4601}])
+        # SN50500 is missing from the sources and gets an empty row
+        df = ObservationsResponse(fixture_series(),
+                                  sources=sources).to_df(optimize=True)
+        self.assertEqual(df['source.countyId'].dtype.name, 'Int8')
+        self.assertEqual(df['source.municipalityId'].dtype.name, 'Int16')
+        self.assertEqual(df['source.countyId'].isnull().sum(), 4)
+
+        series = [s for s in fixture_series()
+                  if s['sourceId'].startswith('SN50540')]
+        df = ObservationsResponse(series, sources=sources).to_df(
+            optimize=True)
+        self.assertEqual(df['source.countyId'].dtype.name, 'int8')
+        self.assertEqual(list(df['source.shortName'].unique()), ['Florida'])
+
+    def test_empty_series(self):
+        df = ObservationsResponse([]).to_df()
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), OBSERVATION_COLUMNS + ['stationId'])
+        self.assertEqual(str(df['referenceTime'].dt.tz), 'UTC')
+        sources = SourcesResponse([{'id': 'SN50540', 'name': 'FLORIDA'}])
+        df = ObservationsResponse([], sources=sources).to_df(optimize=True)
+        self.assertEqual(len(df), 0)
+        self.assertIn('source.name', df.columns)
+
+
+class TestFilterObservationsHook(unittest.TestCase):
+
+    def test_filters_without_reference_time(self):
+        # fields='value,sourceId,qualityCode' leaves out referenceTime
+        body = json.dumps({'data': [
+            {'sourceId': 'SN50540:0', 'observations': [
+                {'value': 1.0, 'qualityCode': 0},
+                {'value': 2.0, 'qualityCode': 5}]},
+            {'sourceId': 'SN50500:0', 'observations': [
+                {'value': 3.0, 'qualityCode': 5}]}]})
+        hook = filter_observations_hook(quality_codes=[0])
+        data = json.loads(body, object_hook=hook)['data']
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['observations'],
+                         [{'value': 1.0, 'qualityCode': 0}])
+
+    def test_filters_everything(self):
+        with open(os.path.join(FIXTURES, 'observations.json')) as f:
+            hook = filter_observations_hook(quality_codes=[99])
+            data = json.load(f, object_hook=hook)['data']
+        self.assertEqual(data, [])
+        self.assertEqual(len(ObservationsResponse(data).to_df()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
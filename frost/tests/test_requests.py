@@ -1,10 +1,13 @@
 import unittest
 
-from pandas import DataFrame
+from pandas import DataFrame, Timestamp
 
+from frost.adaptive import AdaptiveChunkSize
 from frost.client import APIError, Frost
-from frost.models import (AvailableTimeSeriesResponse, ObservationsResponse,
-                          SourcesResponse)
+from frost.models.utils import filter_observations_hook
+from frost.models import (AvailableTimeSeriesResponse, ElementsResponse,
+                          ObservationsCSVResponse, ObservationsResponse,
+                          ResponseCollection, SourcesResponse)
 
 
 class TestFrostRequests(unittest.TestCase):
@@ -26,6 +29,35 @@ class TestFrostRequests(unittest.TestCase):
         self.assertIsInstance(df_res, DataFrame)
         self.assertIsInstance(ids, list)
 
+    def test_get_elements(self):
+        res = self.f.get_elements(ids=['air_temperature'])
+        self.assertIsInstance(res, ElementsResponse)
+        self.assertIsInstance(res.to_str(), str)
+        self.assertIsInstance(res.to_df(), DataFrame)
+        self.assertEqual(res.to_ids_list(), ['air_temperature'])
+
+    def test_validate_elements(self):
+        with self.assertWarns(UserWarning):
+            elements = self.f.validate_elements(
+                [' Sum( precipitation_amount  p1d)',
+                 'summ(precipitation_amount P1D)'])
+        self.assertEqual(elements, ['sum(precipitation_amount P1D)'])
+
+    def test_validate_elements_none_valid(self):
+        with self.assertRaises(ValueError):
+            self.f.validate_elements('summ(precipitation_amount P1D)')
+
+    def test_get_observations_validate_elements(self):
+        with self.assertWarns(UserWarning):
+            res = self.f.get_observations(
+                sources=['SN50540'],
+                elements=['sum(precipitation_amount P1D)',
+                          'meen(air_temperature P1D)'],
+                timeoffsets='PT6H',
+                referencetime='2018-01-01/2018-02-01',
+                validate_elements=True)
+        self.assertEqual(len(res.to_df()), 31)
+
     def test_get_available_timeseries(self):
         res = self.f.get_available_timeseries(sources=['SN50500', 'SN50540'])
         self.assertIsInstance(res, AvailableTimeSeriesResponse)
@@ -45,6 +77,17 @@ class TestFrostRequests(unittest.TestCase):
         df = res.to_df()
         self.assertIn('source.shortName', df.columns)
 
+    def test_get_observations_with_sources(self):
+        res = self.f.get_observations(
+            sources=['SN50500', 'SN50540'],
+            elements=['sum(precipitation_amount P1D)'],
+            timeoffsets='PT6H',
+            referencetime='2018-01-01/2018-02-01',
+            include_sourcemeta=True)
+        df = res.to_df()
+        self.assertEqual(len(df), 62)
+        self.assertTrue((df['source.id'] == df['stationId']).all())
+
     def test_get_observations_month(self):
         res = self.f.get_observations(
             sources=['SN50500', 'SN50540'],
@@ -77,6 +120,124 @@ class TestFrostRequests(unittest.TestCase):
         self.assertEqual(len(df), 31*24)
         self.assertTrue('referenceTime' in df.columns)
 
+    def test_get_observations_optimized_dtypes(self):
+        res = self.f.get_observations(
+            sources=['SN50540', 'SN50500'],
+            elements=['sum(precipitation_amount PT1H)'],
+            referencetime='2018-01-01/2018-02-01')
+        df = res.to_df()
+        df_optimized = res.to_df(optimize=True, float32=True)
+        self.assertEqual(len(df), len(df_optimized))
+        self.assertEqual(df_optimized['elementId'].dtype.name, 'category')
+        self.assertEqual(df_optimized['value'].dtype.name, 'float32')
+        self.assertEqual(df_optimized['qualityCode'].dtype.name.lower(),
+                         'int8')
+
+    def test_get_observations_csv(self):
+        query = dict(sources=['SN50540'],
+                     elements=['sum(precipitation_amount PT1H)'],
+                     referencetime='2018-01-01/2018-02-01')
+        res = self.f.get_observations(transport='csv', **query)
+        self.assertIsInstance(res, ObservationsCSVResponse)
+        df = res.to_df()
+        df_json = self.f.get_observations(**query).to_df()
+        self.assertEqual(len(df), 31*24)
+        self.assertEqual(list(df['value']), list(df_json['value']))
+        self.assertTrue(
+            (df['referenceTime'] == df_json['referenceTime']).all())
+        self.assertEqual(list(df['stationId'].unique()), ['SN50540'])
+
+    def test_get_observations_projection(self):
+        res = self.f.get_observations(
+            sources=['SN50540'],
+            elements=['sum(precipitation_amount PT1H)'],
+            referencetime='2018-01-01/2018-02-01',
+            columns=['value', 'referenceTime'],
+            quality_codes='0,1,2',
+            time_window=('2018-01-10', '2018-01-20'))
+        df = res.to_df()
+        self.assertLessEqual(len(df), 10*24)
+        self.assertNotIn('unit', df.columns)
+        self.assertTrue((df['qualityCode'] <= 2).all())
+        self.assertTrue((df['referenceTime'] >=
+                         Timestamp('2018-01-10', tz='UTC')).all())
+
+    def test_get_observations_levels(self):
+        res = self.f.get_observations(
+            sources=['SN50540'],
+            elements=['air_temperature'],
+            referencetime='2018-01-01/2018-01-02',
+            levels='2,10',
+            level_values=[2])
+        df = res.to_df()
+        self.assertTrue((df['level.value'] == 2).all())
+
+    def test_filter_observations_hook(self):
+        hook = filter_observations_hook(quality_codes='0,1,2',
+                                        level_values='0.1,2')
+        item = hook({'sourceId': 'SN50540:0',
+                     'referenceTime': '2018-01-01T00:00:00.000Z',
+                     'observations': [
+                         {'value': 1.0, 'qualityCode': 0,
+                          'level': {'value': 2}},
+                         {'value': 2.0, 'qualityCode': 5,
+                          'level': {'value': 2}},
+                         {'value': 3.0, 'qualityCode': 0,
+                          'level': {'value': 10}}]})
+        self.assertEqual([o['value'] for o in item['observations']], [1.0])
+        self.assertEqual(hook({'data': [None, item]}), {'data': [item]})
+        self.assertIsNone(filter_observations_hook())
+
+    def test_get_observations_adaptive(self):
+        chunks = AdaptiveChunkSize(initial=24 * 7)
+        res = self.f.get_observations_adaptive(
+            sources=['SN50540'],
+            elements=['sum(precipitation_amount PT1H)'],
+            referencetime='2018-01-01/2018-02-01',
+            chunks=chunks)
+        self.assertIsInstance(res, ObservationsResponse)
+        self.assertEqual(len(res.to_df()), 31*24)
+        self.assertIsNotNone(chunks.seconds_per_unit)
+
+    def test_response_collection(self):
+        query = dict(sources=['SN50540'],
+                     elements=['sum(precipitation_amount PT1H)'],
+                     include_sourcemeta=True)
+        collection = ResponseCollection([
+            self.f.get_observations(referencetime='2018-01-01/2018-01-20',
+                                    **query),
+            self.f.get_observations(referencetime='2018-01-10/2018-02-01',
+                                    **query)])
+        self.assertEqual(len(collection), 2)
+        df = collection.to_df()
+        self.assertIsInstance(df, DataFrame)
+        self.assertEqual(len(df), 31*24)
+        self.assertIn('source.shortName', df.columns)
+        single = self.f.get_observations(
+            referencetime='2018-01-01/2018-02-01', **query).to_df()
+        self.assertEqual(list(df['value']), list(single['value']))
+        self.assertEqual(len(collection.to_list()), 31*24)
+
+    def test_response_collection_type(self):
+        with self.assertRaises(TypeError):
+            ResponseCollection().add(self.f.get_sources(county='12'))
+
+    def test_parse_referencetime(self):
+        start, end = self.f.parse_referencetime('2018-01-01T00:00Z/2018-02-01')
+        self.assertEqual((end - start).days, 31)
+        start, end = self.f.parse_referencetime('2018-01-01/now')
+        self.assertLess(start, end)
+        with self.assertRaises(ValueError):
+            self.f.parse_referencetime('latest')
+
+    def test_get_observations_adaptive_client_options(self):
+        with self.assertRaises(TypeError):
+            self.f.get_observations_adaptive(
+                sources=['SN50540'],
+                elements=['air_temperature'],
+                referencetime='2018-01-01/2018-02-01',
+                transport='csv')
+
     def test_get_observations_error_400(self):
         with self.assertRaisesRegex(APIError, '400'):
             res = self.f.get_observations(
@@ -15,7 +15,6 @@ setup(name='frost-client',
         'Development Status :: 3 - Alpha',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3.7',
-        'Programming Language :: Python :: 3.6',
       ],
       url='https://github.com/BergensTidende/frost-client',
       author='Anders G. Eriksen',
@@ -23,12 +22,13 @@ setup(name='frost-client',
       license='MIT',
       keywords='weather pandas ',
       packages=find_packages(exclude=('tests',)),
-      python_requires='>= 3.6',
+      python_requires='>= 3.7',
       install_requires=[
           'requests'
       ],
       extras_require={
-        'pandas':  ["pandas"]
+        'pandas':  ["pandas"],
+        'arrow':  ["pandas", "pyarrow"]
       },
       test_suite='nose.collector',
       tests_require=['nose'],